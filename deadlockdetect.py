@@ -1,28 +1,92 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from collections import defaultdict
+import tkinter.font as tkfont
+from collections import defaultdict, deque
+from array import array
 import sys
 import math
 import json
+import heapq
+
+def banker_finish(alloc, req, avail):
+    # Safety loop over sparse per-process rows of (resource index, count).
+    # Updates a single work vector in place and bails out of a row on the
+    # first unmet request, so a pass allocates nothing. Returns the finish
+    # flags and the final work vector.
+    work = list(avail)
+    finish = [False] * len(req)
+    while True:
+        progressed = False
+        for p, row in enumerate(req):
+            if finish[p]:
+                continue
+            for r, need in row:
+                if need > work[r]:
+                    break
+            else:
+                for r, held in alloc[p]:
+                    work[r] += held
+                finish[p] = True
+                progressed = True
+        if not progressed:
+            return finish, work
 
 class ResourceAllocationGraph:
     def __init__(self):
         self.processes = set()
         self.resources = {}
-        self.allocations = defaultdict(int)
-        self.requests = defaultdict(int)
+        # Plain dicts holding only nonzero counts, so reads never add keys.
+        self.allocations = {}
+        self.requests = {}
+        # process -> {resource: None}; a dict keeps allocation order stable.
+        self._alloc_by_proc = defaultdict(dict)
         self.next_process_id = 1
         self.next_resource_id = 1
+        self._free_process_ids = []
+        self._free_resource_ids = []
+        # Derived data is cached as (version, value) and is stale once the
+        # version moves on.
+        self._version = 0
+        self._dd_cache = None
+        self._active_edges = None
+
+    def _invalidate(self):
+        # The mutators are the only invalidation path for the cached results
+        # and edge lists; edit the tables through them, not directly.
+        self._version += 1
+
+    def active_edges(self):
+        # (process, resource, count) lists of the requests and allocations,
+        # rebuilt on the first read after an edit.
+        if self._active_edges is None or self._active_edges[0] != self._version:
+            self._active_edges = self._version, (
+                [(p, r, cnt) for (p, r), cnt in self.requests.items()],
+                [(p, r, cnt) for (p, r), cnt in self.allocations.items()],
+            )
+        return self._active_edges[1]
 
     def get_auto_process_name(self):
+        # Ids freed by removals are reused smallest-first; otherwise the
+        # counter only moves forward. Entries whose name was taken again
+        # explicitly (redo, import) are skipped.
+        while self._free_process_ids:
+            name = f"P{heapq.heappop(self._free_process_ids)}"
+            if name not in self.processes:
+                return name
         while f"P{self.next_process_id}" in self.processes:
             self.next_process_id += 1
-        return f"P{self.next_process_id}"
+        self.next_process_id += 1
+        return f"P{self.next_process_id - 1}"
 
     def get_auto_resource_name(self):
+        while self._free_resource_ids:
+            name = f"R{heapq.heappop(self._free_resource_ids)}"
+            if name not in self.resources:
+                return name
         while f"R{self.next_resource_id}" in self.resources:
             self.next_resource_id += 1
-        return f"R{self.next_resource_id}"
+        self.next_resource_id += 1
+        return f"R{self.next_resource_id - 1}"
 
     def add_process(self, process_id=None):
         if not process_id:
@@ -30,6 +94,7 @@ class ResourceAllocationGraph:
         if process_id in self.processes:
             raise ValueError(f"Process {process_id} already exists")
         self.processes.add(process_id)
+        self._invalidate()
         return process_id
 
     def add_resource(self, resource_id=None, instances=1):
@@ -38,56 +103,204 @@ class ResourceAllocationGraph:
         if resource_id in self.resources:
             raise ValueError(f"Resource {resource_id} already exists")
         self.resources[resource_id] = {'total': instances, 'available': instances}
+        self._invalidate()
         return resource_id
 
     def add_request(self, process, resource, count=1):
         if process not in self.processes or resource not in self.resources:
             raise ValueError("Invalid process or resource")
-        self.requests[(process, resource)] += count
+        key = (process, resource)
+        self.requests[key] = self.requests.get(key, 0) + count
+        self._invalidate()
+
+    def remove_request(self, process, resource, count=1):
+        key = (process, resource)
+        if key in self.requests:
+            remaining = self.requests[key] - count
+            if remaining > 0:
+                self.requests[key] = remaining
+            else:
+                del self.requests[key]
+            self._invalidate()
+
+    def remove_process(self, process_id):
+        if process_id in self.processes:
+            self.processes.remove(process_id)
+            if process_id[:1] == "P" and process_id[1:].isdigit():
+                heapq.heappush(self._free_process_ids, int(process_id[1:]))
+            self._invalidate()
+
+    def remove_resource(self, resource_id):
+        if resource_id in self.resources:
+            del self.resources[resource_id]
+            if resource_id[:1] == "R" and resource_id[1:].isdigit():
+                heapq.heappush(self._free_resource_ids, int(resource_id[1:]))
+            self._invalidate()
 
     def add_allocation(self, process, resource, count=1):
         if process not in self.processes or resource not in self.resources:
             raise ValueError("Invalid process or resource")
         if count > self.resources[resource]['available']:
             raise ValueError(f"Not enough instances available")
-        self.allocations[(process, resource)] += count
+        key = (process, resource)
+        self.allocations[key] = self.allocations.get(key, 0) + count
+        self._alloc_by_proc[process][resource] = None
         self.resources[resource]['available'] -= count
+        self._invalidate()
 
     def remove_allocation(self, process, resource, count=1):
-        if (process, resource) in self.allocations:
-            self.allocations[(process, resource)] -= count
+        key = (process, resource)
+        if key in self.allocations:
+            remaining = self.allocations[key] - count
             self.resources[resource]['available'] += count
-            if self.allocations[(process, resource)] <= 0:
-                del self.allocations[(process, resource)]
+            if remaining > 0:
+                self.allocations[key] = remaining
+            else:
+                del self.allocations[key]
+                self._alloc_by_proc[process].pop(resource, None)
+            self._invalidate()
 
     def detect_deadlock(self):
-        work = {r: info['available'] for r, info in self.resources.items()}
-        allocation = defaultdict(lambda: defaultdict(int))
-        request = defaultdict(lambda: defaultdict(int))
+        if not self.requests:
+            return False, [], defaultdict(set)
+        if self._dd_cache is None or self._dd_cache[0] != self._version:
+            # With single-instance resources a cycle in the wait-for graph is
+            # exactly a deadlock; multi-instance resources need the safety check.
+            if all(info['total'] <= 1 for info in self.resources.values()):
+                result = self.detect_deadlock_scc()
+            else:
+                result = self.detect_deadlock_banker()
+            self._dd_cache = (self._version, result)
+        has_deadlock, deadlocked, involved_resources = self._dd_cache[1]
+        return (has_deadlock, list(deadlocked),
+                defaultdict(set, {p: set(rs) for p, rs in involved_resources.items()}))
+
+    def detect_deadlock_banker(self):
+        # Sparse rows read straight off the flat (p, r) -> count tables, so the
+        # safety loop only visits pairs that actually have a count.
+        process_names = list(self.processes)
+        resource_names = list(self.resources)
+        p_idx = {p: i for i, p in enumerate(process_names)}
+        r_idx = {r: j for j, r in enumerate(resource_names)}
+        alloc = [[] for _ in process_names]
+        req = [[] for _ in process_names]
         for (p, r), cnt in self.allocations.items():
-            allocation[p][r] = cnt
+            alloc[p_idx[p]].append((r_idx[r], cnt))
         for (p, r), cnt in self.requests.items():
-            request[p][r] = cnt
-        finish = {p: False for p in self.processes}
-        involved_resources = defaultdict(set)
+            req[p_idx[p]].append((r_idx[r], cnt))
+        avail = [self.resources[r]['available'] for r in resource_names]
+        finish, work = banker_finish(alloc, req, avail)
+
+        dead_idx = [i for i, done in enumerate(finish) if not done]
+        deadlocked = [process_names[i] for i in dead_idx]
+        involved_resources = defaultdict(set, {
+            process_names[i]: {resource_names[j] for j, need in req[i] if need > work[j]}
+            for i in dead_idx
+        })
+        return len(deadlocked) > 0, deadlocked, involved_resources
+
+    def detect_deadlock_scc(self):
+        # Wait-for graph over integer process ids: P -> Q when P requests more
+        # of R than is available and Q holds some of R. Stored CSR-style, the
+        # successors of v being adj[head[v]:head[v + 1]].
+        names = list(self.processes)
+        pid = {p: i for i, p in enumerate(names)}
+        n = len(names)
+        holders = defaultdict(list)
+        for q, r in self.allocations:
+            holders[r].append(pid[q])
+        src, dst = array('i'), array('i')
+        stuck = bytearray(n)
+        for (p, r), need in self.requests.items():
+            if need > self.resources[r]['available']:
+                v = pid[p]
+                if need > self.resources[r]['total']:
+                    stuck[v] = 1
+                for w in holders[r]:
+                    src.append(v)
+                    dst.append(w)
+        head = array('i', [0] * (n + 1))
+        for v in src:
+            head[v + 1] += 1
+        for v in range(n):
+            head[v + 1] += head[v]
+        adj = array('i', [0] * len(dst))
+        fill = head[:n]
+        for v, w in zip(src, dst):
+            adj[fill[v]] = w
+            fill[v] += 1
+
+        # Iterative Tarjan. SCCs come out sinks first, so a component is
+        # deadlocked if it is a cycle, can never be satisfied, or waits on a
+        # component already known to be deadlocked.
+        index = array('i', [-1] * n)
+        low = array('i', [0] * n)
+        on_stack = bytearray(n)
+        dead = bytearray(n)
+        stack = array('i')
+        call_v, call_pos = array('i'), array('i')
+        counter = 0
+        for root in range(n):
+            if index[root] != -1:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            call_v.append(root)
+            call_pos.append(head[root])
+            while call_v:
+                v = call_v[-1]
+                pos, end = call_pos[-1], head[v + 1]
+                while pos < end:
+                    w = adj[pos]
+                    pos += 1
+                    if index[w] == -1:
+                        break
+                    if on_stack[w] and index[w] < low[v]:
+                        low[v] = index[w]
+                else:
+                    w = -1
+                call_pos[-1] = pos
+                if w != -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = 1
+                    call_v.append(w)
+                    call_pos.append(head[w])
+                    continue
+                call_v.pop()
+                call_pos.pop()
+                if call_v and low[v] < low[call_v[-1]]:
+                    low[call_v[-1]] = low[v]
+                if low[v] == index[v]:
+                    i = len(stack) - 1
+                    while stack[i] != v:
+                        i -= 1
+                    component = stack[i:]
+                    del stack[i:]
+                    is_dead = len(component) > 1
+                    for q in component:
+                        on_stack[q] = 0
+                        if stuck[q]:
+                            is_dead = True
+                        for e in range(head[q], head[q + 1]):
+                            if adj[e] == q or dead[adj[e]]:
+                                is_dead = True
+                    if is_dead:
+                        for q in component:
+                            dead[q] = 1
 
-        while True:
-            found = False
-            for p in self.processes:
-                if not finish[p] and all(request[p][r] <= work[r] for r in self.resources):
-                    for r in self.resources:
-                        work[r] += allocation[p][r]
-                    finish[p] = True
-                    found = True
-            if not found:
-                break
-
-        deadlocked = [p for p, done in finish.items() if not done]
-        if deadlocked:
-            for p in deadlocked:
-                for r in request[p]:
-                    if request[p][r] > work[r]:
-                        involved_resources[p].add(r)
+        work = {r: info['available'] for r, info in self.resources.items()}
+        for (q, r), cnt in self.allocations.items():
+            if not dead[pid[q]]:
+                work[r] += cnt
+        involved_resources = defaultdict(set)
+        for (p, r), need in self.requests.items():
+            if dead[pid[p]] and need > work[r]:
+                involved_resources[p].add(r)
+        deadlocked = [p for i, p in enumerate(names) if dead[i]]
         return len(deadlocked) > 0, deadlocked, involved_resources
 
     def get_deadlock_resolution_guide(self, deadlocked, involved_resources):
@@ -99,7 +312,7 @@ class ResourceAllocationGraph:
         guide += "Involved Resources and Requests:\n"
         for p in deadlocked:
             requests = [f"{r} ({self.requests[(p, r)]} requested)" for r in involved_resources[p]]
-            allocations = [f"{r} ({self.allocations[(p, r)]} allocated)" for r in self.resources if (p, r) in self.allocations]
+            allocations = [f"{r} ({self.allocations[(p, r)]} allocated)" for r in self._alloc_by_proc.get(p, ())]
             guide += f"- {p}: Requests: {', '.join(requests) if requests else 'None'}, Allocations: {', '.join(allocations) if allocations else 'None'}\n"
         
         guide += "\nHow to Resolve:\n"
@@ -123,10 +336,26 @@ class ResourceAllocationGraph:
 
     def import_state(self, state_json):
         state = json.loads(state_json)
-        self.processes = set(state["processes"])
-        self.resources = state["resources"]
-        self.allocations = defaultdict(int, state["allocations"])
-        self.requests = defaultdict(int, state["requests"])
+        self.restore((set(state["processes"]), state["resources"],
+                      state["allocations"], state["requests"]))
+
+    def snapshot(self):
+        # In-memory copy for undo; JSON is only needed for files.
+        return (set(self.processes),
+                {r: dict(info) for r, info in self.resources.items()},
+                dict(self.allocations),
+                dict(self.requests))
+
+    def restore(self, snap):
+        processes, resources, allocations, requests = snap
+        self.processes = set(processes)
+        self.resources = {r: dict(info) for r, info in resources.items()}
+        self.allocations = {key: cnt for key, cnt in allocations.items() if cnt > 0}
+        self._alloc_by_proc = defaultdict(dict)
+        for p, r in self.allocations:
+            self._alloc_by_proc[p][r] = None
+        self.requests = {key: cnt for key, cnt in requests.items() if cnt > 0}
+        self._invalidate()
 
 class RAGSimulator(tk.Tk):
     def __init__(self):
@@ -137,8 +366,12 @@ class RAGSimulator(tk.Tk):
         self.selected_nodes = []
         self.edge_mode = None
         self.node_positions = {}
+        self.node_items = {}
+        self.edge_items = {}
+        self.node_edges = defaultdict(set)
         self.dragging = None
-        self.undo_stack = []
+        self._redraw_pending = False
+        self.undo_stack = deque(maxlen=200)
         self.redo_stack = []
         
         # UI Constants
@@ -180,6 +413,12 @@ class RAGSimulator(tk.Tk):
         self.config(menu=menubar)
 
     def setup_ui(self):
+        # Shared canvas fonts, so item creation passes a named font instead of
+        # a tuple Tk has to parse each time.
+        self._font_node = tkfont.Font(family='Helvetica', size=12, weight='bold')
+        self._font_edge = tkfont.Font(family='Helvetica', size=10, weight='bold')
+        self._font_small = tkfont.Font(family='Helvetica', size=10)
+
         main_frame = ttk.Frame(self, padding=10)
         main_frame.pack(fill=tk.BOTH, expand=True)
 
@@ -258,7 +497,7 @@ class RAGSimulator(tk.Tk):
         file_path = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
         if file_path:
             with open(file_path, 'r') as f:
-                self.push_undo_action('import', self.rag.export_state())
+                self.push_undo_action('import', state=self.rag.snapshot())
                 self.rag.import_state(f.read())
             self.reposition_nodes()
             self.update_display()
@@ -270,7 +509,8 @@ class RAGSimulator(tk.Tk):
         self.status.config(text=f"Select nodes for {mode} edge")
 
     def update_display(self):
-        self.canvas.delete("all")
+        # Canvas items persist across redraws: existing ones are moved and
+        # reconfigured, and only added or removed nodes/edges create or delete items.
         self.draw_edges()
         self.draw_nodes()
         self.draw_selection()
@@ -278,71 +518,153 @@ class RAGSimulator(tk.Tk):
                               f"Edges: {len(self.rag.allocations) + len(self.rag.requests)}")
 
     def draw_edges(self):
-        for (p, r), count in self.rag.requests.items():
-            if count > 0 and p in self.node_positions and r in self.node_positions:
-                self.draw_edge(p, r, "request", count)
-        for (p, r), count in self.rag.allocations.items():
-            if count > 0 and p in self.node_positions and r in self.node_positions:
-                self.draw_edge(r, p, "allocation", count)
-
-    def draw_edge(self, from_node, to_node, edge_type, count):
+        active_requests, active_allocations = self.rag.active_edges()
+        edges = [(("request", p, r), count) for p, r, count in active_requests]
+        edges += [(("allocation", r, p), count) for p, r, count in active_allocations]
+        live = set()
+        for key, count in edges:
+            self.draw_edge(key, count)
+            live.add(key)
+        for key in [key for key in self.edge_items if key not in live]:
+            self.canvas.delete(*self.edge_items.pop(key))
+            for node in key[1:]:
+                self.node_edges[node].discard(key)
+                if not self.node_edges[node]:
+                    del self.node_edges[node]
+        self.canvas.tag_lower('edge')
+
+    def draw_edge(self, key, count):
+        edge_type = key[0]
+        if key in self.edge_items:
+            self.canvas.itemconfig(self.edge_items[key][1], text=str(count))
+        else:
+            color = '#EF5350' if edge_type == "request" else '#424242'
+            arrow = tk.FIRST if edge_type == "request" else tk.LAST
+            line_id = self.canvas.create_line(0, 0, 0, 0, fill=color, width=2, arrow=arrow,
+                                              tags=('edge',))
+            label_id = self.canvas.create_text(0, 0, text=str(count), fill=color,
+                                               font=self._font_edge, tags=('edge',))
+            self.edge_items[key] = (line_id, label_id)
+            self.node_edges[key[1]].add(key)
+            self.node_edges[key[2]].add(key)
+        self.place_edge(key)
+
+    def place_edge(self, key):
+        _, from_node, to_node = key
         x1, y1 = self.node_positions[from_node]
         x2, y2 = self.node_positions[to_node]
-        color = '#EF5350' if edge_type == "request" else '#424242'
-        arrow = tk.FIRST if edge_type == "request" else tk.LAST
-        mid_x, mid_y = (x1 + x2) / 2, (y1 + y2) / 2
-        self.canvas.create_line(x1, y1, x2, y2, fill=color, width=2, arrow=arrow)
-        self.canvas.create_text(mid_x, mid_y - 10, text=str(count), fill=color,
-                              font=('Helvetica', 10, 'bold'))
+        line_id, label_id = self.edge_items[key]
+        self.canvas.coords(line_id, x1, y1, x2, y2)
+        self.canvas.coords(label_id, (x1 + x2) / 2, (y1 + y2) / 2 - 10)
 
     def draw_nodes(self):
+        live = set()
         for p in self.rag.processes:
             if p in self.node_positions:
-                x, y = self.node_positions[p]
-                self.canvas.create_oval(x-self.PROCESS_RADIUS, y-self.PROCESS_RADIUS,
-                                      x+self.PROCESS_RADIUS, y+self.PROCESS_RADIUS,
-                                      fill=self.PROCESS_COLOR, outline='#0277BD', width=2,
-                                      tags=('node', p))
-                self.canvas.create_text(x, y, text=p, font=('Helvetica', 12, 'bold'), tags=('text', p))
+                live.add(p)
+                if p not in self.node_items:
+                    shape = self.canvas.create_oval(0, 0, 0, 0, fill=self.PROCESS_COLOR,
+                                                    outline='#0277BD', width=2, tags=('node', p))
+                    label = self.canvas.create_text(0, 0, text=p, font=self._font_node,
+                                                    tags=('text', p))
+                    self.node_items[p] = (shape, label)
+                    self.bind_node(p)
+                self.place_node(p)
         for r in self.rag.resources:
             if r in self.node_positions:
-                x, y = self.node_positions[r]
+                live.add(r)
+                if r not in self.node_items:
+                    shape = self.canvas.create_rectangle(0, 0, 0, 0, outline='#2E7D32', width=2,
+                                                         tags=('node', r))
+                    label = self.canvas.create_text(0, 0, text=r, font=self._font_node,
+                                                    tags=('text', r))
+                    caption = self.canvas.create_text(0, 0, font=self._font_small, tags=('text', r))
+                    self.node_items[r] = (shape, label, caption)
+                    self.bind_node(r)
+                shape, _, caption = self.node_items[r]
                 avail = self.rag.resources[r]['available']
-                fill = self.RESOURCE_COLOR if avail > 0 else '#EF9A9A'
-                self.canvas.create_rectangle(x-self.RESOURCE_SIZE/2, y-self.RESOURCE_SIZE/2,
-                                           x+self.RESOURCE_SIZE/2, y+self.RESOURCE_SIZE/2,
-                                           fill=fill, outline='#2E7D32', width=2, tags=('node', r))
-                self.canvas.create_text(x, y-10, text=r, font=('Helvetica', 12, 'bold'))
-                self.canvas.create_text(x, y+10, text=f"{avail}/{self.rag.resources[r]['total']}",
-                                      font=('Helvetica', 10))
+                self.canvas.itemconfig(shape, fill=self.RESOURCE_COLOR if avail > 0 else '#EF9A9A')
+                self.canvas.itemconfig(caption, text=f"{avail}/{self.rag.resources[r]['total']}")
+                self.place_node(r)
+        for node in [node for node in self.node_items if node not in live]:
+            self.canvas.delete(*self.node_items.pop(node))
+
+    def bind_node(self, node):
+        # Tk dispatches clicks straight to the item under the pointer, so no
+        # per-click search over canvas items is needed.
+        for item in self.node_items[node]:
+            self.canvas.tag_bind(item, "<Button-1>", lambda e, n=node: self.on_node_click(n, e))
+
+    def place_node(self, node):
+        x, y = self.node_positions[node]
+        items = self.node_items[node]
+        if len(items) == 2:
+            shape, label = items
+            size = self.PROCESS_RADIUS
+            self.canvas.coords(label, x, y)
+        else:
+            shape, label, caption = items
+            size = self.RESOURCE_SIZE/2
+            self.canvas.coords(label, x, y-10)
+            self.canvas.coords(caption, x, y+10)
+        self.canvas.coords(shape, x-size, y-size, x+size, y+size)
+
+    def _move_node(self, node, x, y):
+        self.node_positions[node] = (x, y)
+        self.place_node(node)
+        for key in self.node_edges.get(node, ()):
+            self.place_edge(key)
+        if node in self.selected_nodes:
+            self.draw_selection()
 
     def draw_selection(self):
+        self.canvas.delete('selection')
         for node in self.selected_nodes:
             x, y = self.node_positions[node]
             size = self.PROCESS_RADIUS if node in self.rag.processes else self.RESOURCE_SIZE/2
             self.canvas.create_oval(x-size-5, y-size-5, x+size+5, y+size+5,
-                                  outline='#FFB300', width=2, dash=(4, 2))
+                                  outline='#FFB300', width=2, dash=(4, 2), tags=('selection',))
 
     def on_click(self, event):
-        item = self.canvas.find_closest(event.x, event.y)
-        tags = self.canvas.gettags(item)
+        # Node clicks are handled by on_node_click; only react to empty canvas.
+        tags = self.canvas.gettags('current')
         if 'node' in tags or 'text' in tags:
-            node = tags[1]
-            if self.edge_mode:
-                if node not in self.selected_nodes:
-                    self.selected_nodes.append(node)
-                    if len(self.selected_nodes) == 2:
-                        self.create_edge()
-            else:
-                self.dragging = node
-                self.drag_offset = (event.x - self.node_positions[node][0],
-                                  event.y - self.node_positions[node][1])
-            self.update_display()
+            return
+        if self.selected_nodes:
+            self.selected_nodes = []
+            self.draw_selection()
+
+    def on_node_click(self, node, event):
+        if self.edge_mode:
+            if node not in self.selected_nodes:
+                self.selected_nodes.append(node)
+                if len(self.selected_nodes) == 2:
+                    self.create_edge()
+        else:
+            self.dragging = node
+            self.drag_offset = (event.x - self.node_positions[node][0],
+                              event.y - self.node_positions[node][1])
+        self.update_display()
 
     def on_drag(self, event):
-        if self.dragging:
-            self.node_positions[self.dragging] = (event.x - self.drag_offset[0],
-                                                event.y - self.drag_offset[1])
+        if self.dragging not in self.node_items:
+            # Nothing grabbed, or the node went away mid-drag (undo, reset, load).
+            self.dragging = None
+            return
+        # Motion events arrive faster than Tk repaints; record the latest
+        # position and move the items once the event queue drains.
+        self.node_positions[self.dragging] = (event.x - self.drag_offset[0],
+                                            event.y - self.drag_offset[1])
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.after_idle(self._do_redraw)
+
+    def _do_redraw(self):
+        self._redraw_pending = False
+        if self.dragging in self.node_items:
+            self._move_node(self.dragging, *self.node_positions[self.dragging])
+        else:
+            self.dragging = None
             self.update_display()
 
     def on_release(self, event):
@@ -369,31 +691,39 @@ class RAGSimulator(tk.Tk):
             self.clear_selection()
 
     def push_undo_action(self, action_type, node1=None, node2=None, count=0, state=None):
-        self.undo_stack.append({
-            'type': action_type, 'node1': node1, 'node2': node2,
-            'count': count, 'state': state, 'positions': self.node_positions.copy()
-        })
+        # Record only what is needed to reverse the action; the full layout is
+        # kept just for imports/resets, which replace the whole graph.
+        action = {'type': action_type, 'node1': node1, 'node2': node2, 'count': count}
+        if action_type in ('add_process', 'add_resource'):
+            action['position'] = self.node_positions[node1]
+        elif action_type == 'import':
+            action['state'] = state
+            action['positions'] = self.node_positions.copy()
+        self.undo_stack.append(action)
         self.redo_stack.clear()
 
+    def swap_import_state(self, action):
+        state, positions = self.rag.snapshot(), self.node_positions
+        self.rag.restore(action['state'])
+        self.node_positions = action['positions']
+        action['state'], action['positions'] = state, positions
+
     def undo(self):
         if not self.undo_stack:
             return
         action = self.undo_stack.pop()
         if action['type'] == 'request':
-            self.rag.requests[(action['node1'], action['node2'])] -= action['count']
-            if self.rag.requests[(action['node1'], action['node2'])] <= 0:
-                del self.rag.requests[(action['node1'], action['node2'])]
+            self.rag.remove_request(action['node1'], action['node2'], action['count'])
         elif action['type'] == 'allocation':
-            self.rag.remove_allocation(action['node2'], action['node1'], action['count'])
+            self.rag.remove_allocation(action['node1'], action['node2'], action['count'])
         elif action['type'] == 'add_process':
-            self.rag.processes.remove(action['node1'])
+            self.rag.remove_process(action['node1'])
             del self.node_positions[action['node1']]
         elif action['type'] == 'add_resource':
-            del self.rag.resources[action['node1']]
+            self.rag.remove_resource(action['node1'])
             del self.node_positions[action['node1']]
         elif action['type'] == 'import':
-            self.rag.import_state(action['state'])
-            self.node_positions = action['positions']
+            self.swap_import_state(action)
         self.redo_stack.append(action)
         self.update_display()
 
@@ -404,17 +734,15 @@ class RAGSimulator(tk.Tk):
         if action['type'] == 'request':
             self.rag.add_request(action['node1'], action['node2'], action['count'])
         elif action['type'] == 'allocation':
-            self.rag.add_allocation(action['node2'], action['node1'], action['count'])
+            self.rag.add_allocation(action['node1'], action['node2'], action['count'])
         elif action['type'] == 'add_process':
             self.rag.add_process(action['node1'])
-            self.node_positions[action['node1']] = action['positions'][action['node1']]
+            self.node_positions[action['node1']] = action['position']
         elif action['type'] == 'add_resource':
             self.rag.add_resource(action['node1'], action['count'])
-            self.node_positions[action['node1']] = action['positions'][action['node1']]
+            self.node_positions[action['node1']] = action['position']
         elif action['type'] == 'import':
-            curr_state = self.rag.export_state()
-            self.rag.import_state(action['state'])
-            action['state'] = curr_state
+            self.swap_import_state(action)
         self.undo_stack.append(action)
         self.update_display()
 
@@ -462,7 +790,7 @@ class RAGSimulator(tk.Tk):
 
     def reset_graph(self):
         if messagebox.askyesno("Reset", "Clear all data?"):
-            self.push_undo_action('import', self.rag.export_state())
+            self.push_undo_action('import', state=self.rag.snapshot())
             self.rag = ResourceAllocationGraph()
             self.node_positions = {}
             self.clear_selection()